@@ -13,3 +13,56 @@ TOP_SNIPPETS = int(os.getenv("TOP_SNIPPETS", "20"))
 
 # Misc
 USER_AGENT = "Mozilla/5.0 FakeyeBot/1.0"
+
+# Model server (optional). When enabled, workers talk to a single
+# per-host process (python -m app.models.server) instead of loading models.
+USE_MODEL_SERVER = os.getenv("USE_MODEL_SERVER", "0") == "1"
+# Socket and auth key default to a private (0700) runtime dir; see app/models/ipc.py
+MODEL_SERVER_RUNTIME_DIR = os.getenv("MODEL_SERVER_RUNTIME_DIR", "")
+MODEL_SERVER_SOCKET = os.getenv("MODEL_SERVER_SOCKET", "")
+MODEL_SERVER_AUTHKEY = os.getenv("MODEL_SERVER_AUTHKEY", "")  # empty = generated key file
+MODEL_SERVER_LOAD_NLI = os.getenv("MODEL_SERVER_LOAD_NLI", "0") == "1"
+MODEL_SERVER_MAX_BATCH = int(os.getenv("MODEL_SERVER_MAX_BATCH", "64"))
+MODEL_SERVER_BATCH_WAIT_MS = float(os.getenv("MODEL_SERVER_BATCH_WAIT_MS", "5"))
+MODEL_SERVER_THREADS = int(os.getenv("MODEL_SERVER_THREADS", "0"))  # 0 = torch default
+
+# Semantic verdict cache (paraphrase-tolerant, see app/utils/semantic_cache.py)
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "1") == "1"
+SEMANTIC_CACHE_DIR = os.getenv("SEMANTIC_CACHE_DIR", "data/semantic_cache")  # shared by workers; saves merge with disk
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+SEMANTIC_CACHE_TTL = int(os.getenv("SEMANTIC_CACHE_TTL", "86400"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "50000"))
+SEMANTIC_CACHE_PERSIST_INTERVAL = int(os.getenv("SEMANTIC_CACHE_PERSIST_INTERVAL", "300"))  # s; also saved at shutdown
+
+# Near-duplicate snippet collapse before stance detection (app/retriever/dedup.py)
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "1") == "1"
+DEDUP_SIM_THRESHOLD = float(os.getenv("DEDUP_SIM_THRESHOLD", "0.92"))  # cosine, embedding path
+DEDUP_JACCARD_THRESHOLD = float(os.getenv("DEDUP_JACCARD_THRESHOLD", "0.6"))  # MinHash fallback
+
+# Traffic capture / replay of external calls (app/utils/replay.py)
+REPLAY_MODE = os.getenv("REPLAY_MODE", "off")  # off | record | replay
+REPLAY_DIR = os.getenv("REPLAY_DIR", "data/replay")
+REPLAY_TIME_SCALE = float(os.getenv("REPLAY_TIME_SCALE", "1.0"))  # 0 = no simulated latency
+
+# Stale-while-revalidate refresh of hot claims (app/utils/refresh.py)
+SWR_ENABLED = os.getenv("SWR_ENABLED", "1") == "1"
+SWR_SOFT_TTL = int(os.getenv("SWR_SOFT_TTL", "900"))  # serve as-is until this age (s)
+SWR_HARD_TTL = int(os.getenv("SWR_HARD_TTL", "21600"))  # serve stale + revalidate until this age (s)
+SWR_TOP_N = int(os.getenv("SWR_TOP_N", "50"))  # hot claims refreshed proactively
+SWR_INTERVAL = int(os.getenv("SWR_INTERVAL", "60"))  # scheduler tick (s)
+SWR_HALF_LIFE = int(os.getenv("SWR_HALF_LIFE", "3600"))  # popularity decay (s)
+SWR_MAX_TRACKED = int(os.getenv("SWR_MAX_TRACKED", "10000"))
+SWR_SERP_BUDGET_PER_HOUR = int(os.getenv("SWR_SERP_BUDGET_PER_HOUR", "200"))
+SWR_GROQ_BUDGET_PER_HOUR = int(os.getenv("SWR_GROQ_BUDGET_PER_HOUR", "2000"))
+
+# Hedged multi-provider search (app/retriever/search.py)
+SEARCH_HEDGE_DELAY_MS = float(os.getenv("SEARCH_HEDGE_DELAY_MS", "800"))  # start next provider after this
+SEARCH_MERGE = os.getenv("SEARCH_MERGE", "0") == "1"  # merge results instead of first-good-wins
+SEARCH_MERGE_GRACE_MS = float(os.getenv("SEARCH_MERGE_GRACE_MS", "300"))  # extra wait for others when merging
+
+# Headless-browser fallback for JS-rendered pages (app/retriever/render.py)
+RENDER_ENABLED = os.getenv("RENDER_ENABLED", "1") == "1"
+RENDER_MIN_CHARS = int(os.getenv("RENDER_MIN_CHARS", "500"))  # render only if static text is shorter
+RENDER_POOL_SIZE = int(os.getenv("RENDER_POOL_SIZE", "4"))  # concurrent pages
+RENDER_MAX_USES = int(os.getenv("RENDER_MAX_USES", "50"))  # recycle a context after this many pages
+RENDER_TIMEOUT_MS = int(os.getenv("RENDER_TIMEOUT_MS", "15000"))
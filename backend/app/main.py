@@ -1,4 +1,5 @@
 import os
+import asyncio
 import logging
 from dotenv import load_dotenv
 
@@ -9,9 +10,19 @@ from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 import requests
 
-from app.retriever.rank import rank_snippets
+from app.config import (
+    SEMANTIC_CACHE_ENABLED, SEMANTIC_CACHE_TTL, SEMANTIC_CACHE_PERSIST_INTERVAL,
+    DEDUP_ENABLED, REPLAY_MODE, SWR_ENABLED, SWR_HARD_TTL,
+)
+from app.retriever.rank import rank_snippets, embedder
 from app.retriever.aggregate import aggregate_verdict
+from app.retriever.dedup import collapse_duplicates
 from app.retriever.stance import detect_stance
+from app.retriever.render import close_pool
+from app.utils.semantic_cache import SemanticCache
+from app.utils.replay import replayable, log_claim, ReplayMiss
+from app.utils import replay
+from app.utils.refresh import ClaimRefresher
 
 app = FastAPI(title="fakeye-api")
 
@@ -26,11 +37,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# reuses the ranking embedder, so no extra model is loaded
+# with SWR on, a paraphrase must not outlive the hard TTL of the claim it came from
+semantic_cache = SemanticCache(
+    embedder, ttl=min(SEMANTIC_CACHE_TTL, SWR_HARD_TTL) if SWR_ENABLED else SEMANTIC_CACHE_TTL,
+) if SEMANTIC_CACHE_ENABLED else None
+_persist_task = None
+
 
 class PredictRequest(BaseModel):
     text: str
 
 
+@replayable("serp", lambda query, api_key, num=10: {"q": query, "num": num})
 def serp_search(query: str, api_key: str, num: int = 10) -> dict:
     url = "https://serpapi.com/search.json"
     params = {"q": query, "api_key": api_key, "num": num}
@@ -44,17 +63,118 @@ async def root():
     return {"ok": True, "status": "Fakeye API (Groq stance)"}
 
 
+@app.get("/stats")
+async def stats():
+    return {
+        "semantic_cache": semantic_cache.stats() if semantic_cache else None,
+        "refresher": refresher.stats() if refresher else None,
+        "replay": replay.stats() if REPLAY_MODE != "off" else None,
+    }
+
+
+async def _persist_semantic_cache():
+    while True:
+        await asyncio.sleep(SEMANTIC_CACHE_PERSIST_INTERVAL)
+        try:
+            await asyncio.to_thread(semantic_cache.save)
+        except Exception:
+            logger.exception("Semantic cache save failed")
+
+
+@app.on_event("startup")
+async def start_semantic_cache_persistence():
+    global _persist_task
+    if semantic_cache:
+        _persist_task = asyncio.ensure_future(_persist_semantic_cache())
+
+
+@app.on_event("shutdown")
+async def save_semantic_cache():
+    if semantic_cache:
+        if _persist_task:
+            _persist_task.cancel()
+        await asyncio.to_thread(semantic_cache.save)
+
+
+@app.on_event("startup")
+async def start_refresher():
+    if refresher:
+        refresher.start()
+
+
+@app.on_event("shutdown")
+async def stop_refresher():
+    if refresher:
+        await refresher.stop()
+
+
+@app.on_event("shutdown")
+async def stop_renderer():
+    # the headless browser is only launched if scraping ever needed it
+    await close_pool()
+
+
 @app.post("/predict")
 async def predict(req: PredictRequest):
-    if not SERPAPI_API_KEY:
+    if not SERPAPI_API_KEY and REPLAY_MODE != "replay":
         raise HTTPException(500, "SERPAPI_API_KEY not set")
 
     claim = (req.text or "").strip()
     if not claim:
         raise HTTPException(400, "Empty text")
 
+    log_claim(claim)
+
+    # exact claim seen recently: served even past soft expiry, refreshed in the background
+    if refresher:
+        stored = refresher.get(claim)
+        if stored:
+            return {**stored, "input": claim, "cached": "exact"}
+
+    # a hard-expired exact claim must be recomputed, not served again via the semantic cache
+    if semantic_cache and not (refresher and refresher.tracks(claim)):
+        try:
+            cached = semantic_cache.get(claim)
+        except Exception:
+            logger.exception("Semantic cache lookup failed")
+            cached = None
+        if cached:
+            return cached
+
+    if refresher:
+        return await refresher.fetch(claim)
+    return await compute_verdict(claim)
+
+
+async def compute_verdict(claim: str) -> dict:
+    result = await run_pipeline(claim)
+
+    # don't pin a verdict that came from an empty / failed search
+    if semantic_cache and result["top_matches"] and _cacheable(result):
+        try:
+            semantic_cache.put(claim, result)
+        except Exception:
+            logger.exception("Semantic cache store failed")
+
+    return result
+
+
+def _cacheable(result: dict) -> bool:
+    # replayed verdicts may rest on neutral stand-ins for unrecorded stance calls
+    return REPLAY_MODE != "replay"
+
+
+refresher = ClaimRefresher(compute_verdict, should_store=_cacheable) if SWR_ENABLED else None
+
+
+async def run_pipeline(claim: str) -> dict:
+    """Search + rank + stance + aggregate for one claim. Raises HTTPException on search failure."""
     try:
-        json_resp = serp_search(claim, SERPAPI_API_KEY, num=10)
+        # blocking calls run in threads so background refreshes don't stall other requests
+        json_resp = await asyncio.to_thread(serp_search, claim, SERPAPI_API_KEY, 10)
+    except ReplayMiss:
+        # counted and logged by app.utils.replay
+        raise HTTPException(404, "No recorded search response for this claim (replay mode)")
     except Exception:
         logger.exception("Search failed")
         raise HTTPException(502, "Search failed")
@@ -75,12 +195,30 @@ async def predict(req: PredictRequest):
 
     ranked = await rank_snippets(claim, candidates, top_k=min(10, len(candidates)))
 
+    # Judge one representative per near-duplicate cluster, fan the stance out to the rest
+    if DEDUP_ENABLED:
+        clusters = collapse_duplicates(ranked)
+    else:
+        clusters = [[r] for r in ranked]
+
+    judged = {}
+    for members in clusters:
+        rep = members[0]
+        llm_result = await asyncio.to_thread(detect_stance, claim, rep.get("snippet") or rep.get("text") or "")
+        for r in members:
+            judged[id(r)] = (llm_result, rep, len(members))
+
+    stance_calls = len(clusters)
+    stance_calls_saved = len(ranked) - stance_calls
+    if stance_calls_saved:
+        logger.info("Dedup saved %d of %d stance calls", stance_calls_saved, len(ranked))
+
     evidence = []
 
     for r in ranked:
         snippet_text = r.get("snippet") or r.get("text") or ""
 
-        llm_result = detect_stance(claim, snippet_text)
+        llm_result, rep, cluster_size = judged[id(r)]
 
         publisher = None
         if r.get("url"):
@@ -98,6 +236,8 @@ async def predict(req: PredictRequest):
             "stance": llm_result.stance,
             "stance_conf": float(llm_result.confidence),
             "explanation": llm_result.explanation,
+            "cluster_size": cluster_size,
+            "duplicate_of": rep.get("url") if rep is not r else None,
         })
 
     # ✅ AGGREGATE VERDICT
@@ -125,4 +265,6 @@ async def predict(req: PredictRequest):
         "verdict_summary": summary,
         "verdict_reason": verdict_reason,   # ✅ THIS MAKES REASON CARD APPEAR
         "top_matches": evidence[:5],
+        "stance_calls": stance_calls,
+        "stance_calls_saved": stance_calls_saved,
     }
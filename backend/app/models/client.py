@@ -0,0 +1,149 @@
+# app/models/client.py
+"""
+Thin clients for the per-host model server (app/models/server.py).
+
+EmbedderClient and NLIClient expose the same methods as Embedder and
+NLIModel, so callers can use load_embedder() / load_nli() and stay unaware
+of whether the model lives in-process or in the server.
+"""
+
+import atexit
+import threading
+from multiprocessing import shared_memory
+from multiprocessing.connection import Client
+
+import numpy as np
+
+from app.config import USE_MODEL_SERVER
+from app.models.ipc import socket_path, load_authkey
+
+MIN_SHM_BYTES = 1 << 20
+
+
+class _ModelServerConnection:
+    def __init__(self, address: str = None, authkey: bytes = None):
+        self.address = address
+        self.authkey = authkey
+        self.dim = None
+        self.has_nli = False
+        self._conn = None
+        self._shm = None
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+
+    def _connect(self):
+        # resolved on connect: the server generates the key file when it starts
+        address = self.address or socket_path()
+        authkey = self.authkey or load_authkey()
+        self._conn = Client(address, family="AF_UNIX", authkey=authkey)
+        info = self._call({"op": "info"})
+        self.dim = int(info["dim"])
+        self.has_nli = bool(info["nli"])
+
+    def _call(self, msg: dict) -> dict:
+        self._conn.send(msg)
+        resp = self._conn.recv()
+        if not resp.get("ok"):
+            raise RuntimeError(f"model server: {resp.get('error')}")
+        return resp
+
+    def _request(self, fn):
+        # connect lazily and retry once if the server was restarted
+        with self._lock:
+            for attempt in (0, 1):
+                try:
+                    if self._conn is None:
+                        self._connect()
+                    return fn()
+                except (EOFError, OSError):
+                    self._drop_conn()
+                    if attempt:
+                        raise
+
+    def _drop_conn(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except OSError:
+                pass
+        self._conn = None
+
+    def _buffer(self, nbytes: int) -> shared_memory.SharedMemory:
+        if self._shm is None or self._shm.size < nbytes:
+            self._free_shm()
+            self._shm = shared_memory.SharedMemory(create=True, size=max(nbytes, MIN_SHM_BYTES))
+        return self._shm
+
+    def _free_shm(self):
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def embed(self, texts) -> np.ndarray:
+        texts = list(texts)
+
+        def run():
+            if not texts:
+                return np.zeros((0, self.dim), np.float32)
+            shm = self._buffer(len(texts) * self.dim * 4)
+            resp = self._call({"op": "embed", "texts": texts, "shm": shm.name})
+            # one memcpy out of the shared block; the buffer is reused next call
+            return np.ndarray(tuple(resp["shape"]), np.float32, buffer=shm.buf).copy()
+
+        return self._request(run)
+
+    def nli(self, pairs) -> list:
+        pairs = [(p, h) for p, h in pairs]
+        return self._request(lambda: self._call({"op": "nli", "pairs": pairs})["results"])
+
+    def close(self):
+        with self._lock:
+            self._drop_conn()
+            self._free_shm()
+
+
+_connection = None
+_connection_lock = threading.Lock()
+
+
+def get_connection() -> _ModelServerConnection:
+    global _connection
+    with _connection_lock:
+        if _connection is None:
+            _connection = _ModelServerConnection()
+        return _connection
+
+
+class EmbedderClient:
+    def __init__(self, conn: _ModelServerConnection = None):
+        self._conn = conn or get_connection()
+
+    def embed_texts(self, texts):
+        # already normalized by the server-side Embedder
+        return self._conn.embed(texts)
+
+
+class NLIClient:
+    def __init__(self, conn: _ModelServerConnection = None):
+        self._conn = conn or get_connection()
+
+    def predict_entailment(self, premise: str, hypothesis: str):
+        return self._conn.nli([(premise, hypothesis)])[0]
+
+    def predict_entailment_batch(self, pairs):
+        return self._conn.nli(pairs)
+
+
+def load_embedder():
+    if USE_MODEL_SERVER:
+        return EmbedderClient()
+    from app.models.embedder import Embedder
+    return Embedder()
+
+
+def load_nli():
+    if USE_MODEL_SERVER:
+        return NLIClient()
+    from app.models.nli import NLIModel
+    return NLIModel()
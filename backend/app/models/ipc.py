@@ -0,0 +1,59 @@
+# app/models/ipc.py
+"""
+Socket location and auth key for the model server.
+
+multiprocessing.connection unpickles what it receives, so both ends must
+only ever talk to a peer that knows the auth key. The socket and the
+generated key file live in a private (0700) runtime dir owned by the
+current user, so another local user can neither read the key nor bind
+the socket path.
+"""
+
+import os
+import stat
+import secrets
+import tempfile
+from pathlib import Path
+
+from app.config import MODEL_SERVER_RUNTIME_DIR, MODEL_SERVER_SOCKET, MODEL_SERVER_AUTHKEY
+
+KEY_FILE = "models.key"
+SOCKET_FILE = "models.sock"
+
+
+def runtime_dir() -> Path:
+    if MODEL_SERVER_RUNTIME_DIR:
+        d = Path(MODEL_SERVER_RUNTIME_DIR)
+    elif os.getenv("XDG_RUNTIME_DIR"):
+        d = Path(os.environ["XDG_RUNTIME_DIR"]) / "fakeye"
+    else:
+        d = Path(tempfile.gettempdir()) / f"fakeye-{os.getuid()}"
+    d.mkdir(mode=0o700, parents=True, exist_ok=True)
+    st = d.lstat()
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o077:
+        raise PermissionError(f"model server runtime dir {d} must be a 0700 directory owned by this user")
+    return d
+
+
+def socket_path() -> str:
+    return MODEL_SERVER_SOCKET or str(runtime_dir() / SOCKET_FILE)
+
+
+def load_authkey(create: bool = False) -> bytes:
+    """MODEL_SERVER_AUTHKEY if set, else the key file (generated by the server when create=True)."""
+    if MODEL_SERVER_AUTHKEY:
+        return MODEL_SERVER_AUTHKEY.encode()
+
+    path = runtime_dir() / KEY_FILE
+    if create:
+        tmp = path.with_suffix(".tmp")
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            f.write(secrets.token_hex(32))
+        os.replace(tmp, path)
+
+    if not path.exists():
+        raise FileNotFoundError(f"model server key {path} not found; is app.models.server running?")
+    if path.stat().st_mode & 0o077:
+        raise PermissionError(f"model server key {path} must not be readable by other users")
+    return path.read_text().strip().encode()
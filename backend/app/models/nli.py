@@ -24,3 +24,19 @@ class NLIModel:
             res[lab] = float(probs[i])
         # return in keys: entailment, neutral, contradiction
         return {"entailment": res.get("entailment", 0.0), "neutral": res.get("neutral", 0.0), "contradiction": res.get("contradiction", 0.0)}
+
+    def predict_entailment_batch(self, pairs):
+        # pairs = [(premise, hypothesis), ...]; same output format as predict_entailment
+        if not pairs:
+            return []
+        premises = [p for p, _ in pairs]
+        hypotheses = [h for _, h in pairs]
+        inputs = self.tokenizer(premises, hypotheses, return_tensors="pt", truncation=True, max_length=512, padding=True)
+        with torch.no_grad():
+            logits = self.model(**inputs).logits
+            probs = torch.softmax(logits, dim=1).cpu().numpy()
+        out = []
+        for row in probs:
+            res = {lab: float(row[i]) for i, lab in self.label_map.items()}
+            out.append({"entailment": res.get("entailment", 0.0), "neutral": res.get("neutral", 0.0), "contradiction": res.get("contradiction", 0.0)})
+        return out
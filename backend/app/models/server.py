@@ -0,0 +1,198 @@
+# app/models/server.py
+"""
+Per-host model server. Owns the Embedder (and optionally the NLIModel) and
+serves embed/NLI requests from uvicorn workers over a local unix socket, so
+model memory is paid once per host instead of once per worker.
+
+Requests arriving from different workers are micro-batched into a single
+forward pass. Embedding vectors are written straight into a shared memory
+block owned by the client, so only the texts travel over the socket.
+
+Run with:
+    python -m app.models.server
+and start the API with USE_MODEL_SERVER=1 (see app/models/client.py).
+"""
+
+import os
+import queue
+import threading
+import time
+import logging
+from multiprocessing import shared_memory
+from multiprocessing.connection import Listener, AuthenticationError
+
+import numpy as np
+
+from app.models.ipc import socket_path, load_authkey
+from app.config import (
+    MODEL_SERVER_LOAD_NLI,
+    MODEL_SERVER_MAX_BATCH,
+    MODEL_SERVER_BATCH_WAIT_MS,
+    MODEL_SERVER_THREADS,
+)
+
+logger = logging.getLogger("fakeye.models")
+
+
+def _attach_shm(name: str) -> shared_memory.SharedMemory:
+    # The client creates and unlinks the block; we must not track it here,
+    # otherwise our resource tracker would unlink it when we exit.
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        from multiprocessing import resource_tracker
+        shm = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+class _Batcher:
+    """
+    Collects work items from many connections and runs them through `fn`
+    in one call. `fn` takes a list of items and returns a sliceable result
+    of the same length.
+    """
+
+    def __init__(self, fn, max_batch: int, wait_ms: float):
+        self.fn = fn
+        self.max_batch = max(1, max_batch)
+        self.wait_s = max(0.0, wait_ms) / 1000.0
+        self.q = queue.Queue()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def submit(self, items):
+        job = {"items": items, "done": threading.Event(), "result": None, "error": None}
+        self.q.put(job)
+        job["done"].wait()
+        if job["error"] is not None:
+            raise job["error"]
+        return job["result"]
+
+    def _run(self):
+        while True:
+            jobs = [self.q.get()]
+            n = len(jobs[0]["items"])
+            deadline = time.monotonic() + self.wait_s
+            while n < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    job = self.q.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                jobs.append(job)
+                n += len(job["items"])
+
+            items = [it for j in jobs for it in j["items"]]
+            try:
+                results = self.fn(items)
+            except Exception as e:
+                logger.exception("Batch of %d items failed", len(items))
+                for j in jobs:
+                    j["error"] = e
+                    j["done"].set()
+                continue
+
+            i = 0
+            for j in jobs:
+                k = len(j["items"])
+                j["result"] = results[i:i + k]
+                i += k
+                j["done"].set()
+
+
+def _serve_conn(conn, embed_batcher, nli_batcher, dim: int):
+    attached = {}
+    try:
+        while True:
+            try:
+                msg = conn.recv()
+            except (EOFError, OSError):
+                return
+
+            op = msg.get("op")
+            try:
+                if op == "info":
+                    conn.send({"ok": True, "dim": dim, "nli": nli_batcher is not None})
+
+                elif op == "embed":
+                    embs = np.asarray(embed_batcher.submit(list(msg["texts"])), np.float32)
+                    name = msg["shm"]
+                    if name not in attached:
+                        # client grew its buffer; drop the old mapping
+                        for old in attached.values():
+                            old.close()
+                        attached.clear()
+                        attached[name] = _attach_shm(name)
+                    shm = attached[name]
+                    if embs.nbytes > shm.size:
+                        conn.send({"ok": False, "error": "shared buffer too small"})
+                        continue
+                    view = np.ndarray(embs.shape, np.float32, buffer=shm.buf)
+                    view[:] = embs
+                    del view
+                    conn.send({"ok": True, "shape": embs.shape})
+
+                elif op == "nli":
+                    if nli_batcher is None:
+                        conn.send({"ok": False, "error": "NLI model not loaded"})
+                        continue
+                    pairs = [tuple(p) for p in msg["pairs"]]
+                    conn.send({"ok": True, "results": list(nli_batcher.submit(pairs))})
+
+                else:
+                    conn.send({"ok": False, "error": f"unknown op: {op}"})
+
+            except Exception as e:
+                logger.exception("Request %s failed", op)
+                conn.send({"ok": False, "error": repr(e)})
+    finally:
+        for shm in attached.values():
+            shm.close()
+        conn.close()
+
+
+def serve(address: str = None, load_nli: bool = MODEL_SERVER_LOAD_NLI):
+    address = address or socket_path()
+    authkey = load_authkey(create=True)
+
+    if MODEL_SERVER_THREADS > 0:
+        import torch
+        torch.set_num_threads(MODEL_SERVER_THREADS)
+
+    from app.models.embedder import Embedder
+    embedder = Embedder()
+    dim = int(embedder.model.get_sentence_embedding_dimension())
+    embed_batcher = _Batcher(
+        lambda texts: np.asarray(embedder.embed_texts(texts), np.float32),
+        MODEL_SERVER_MAX_BATCH,
+        MODEL_SERVER_BATCH_WAIT_MS,
+    )
+
+    nli_batcher = None
+    if load_nli:
+        from app.models.nli import NLIModel
+        nli = NLIModel()
+        # NLI inputs are much longer than claims; keep its batches smaller
+        nli_batcher = _Batcher(nli.predict_entailment_batch, max(1, MODEL_SERVER_MAX_BATCH // 4), MODEL_SERVER_BATCH_WAIT_MS)
+
+    if os.path.exists(address):
+        os.unlink(address)
+
+    with Listener(address, family="AF_UNIX", authkey=authkey) as listener:
+        logger.info("Model server listening on %s (dim=%d, nli=%s)", address, dim, load_nli)
+        while True:
+            try:
+                conn = listener.accept()
+            except (AuthenticationError, OSError):
+                logger.warning("Rejected model server connection", exc_info=True)
+                continue
+            threading.Thread(
+                target=_serve_conn, args=(conn, embed_batcher, nli_batcher, dim), daemon=True
+            ).start()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    serve()
@@ -55,6 +55,12 @@ def _is_factual_claim(claim: str) -> bool:
     
     return False
 
+def _source_count(items: List[Dict]) -> int:
+    """Number of distinct sources: near-duplicate copies of one story add up to 1."""
+    if not items:
+        return 0
+    return max(1, int(round(sum(it.get("share", 1.0) for it in items))))
+
 def _map_avg_conf_to_label(avg_conf: float, is_factual: bool = False) -> str:
     """
     Map average confidence to a label.
@@ -109,18 +115,20 @@ def aggregate_verdict(claim: str, evidence: List[Dict], verbose: bool = False) -
     for e in evidence:
         sim = float(e.get("semantic_sim", 0.0) or 0.0)
         conf = float(e.get("stance_conf", sim) or sim or 0.0)
-        weight = sim * conf
+        # Near-duplicate snippets (see dedup.py) share one vote across their cluster
+        share = 1.0 / max(1, int(e.get("cluster_size", 1) or 1))
+        weight = sim * conf * share
         stance = (e.get("stance") or "").lower()
 
         if stance == "support":
-            signed = +1.0 * (sim * conf)
+            signed = +1.0 * weight
         elif stance == "contradict":
-            signed = -1.0 * (sim * conf)
+            signed = -1.0 * weight
         else:
             # For factual claims, neutral with high similarity = slight negative
             # (the evidence exists but doesn't support the claim)
             if is_factual and sim > 0.5:
-                signed = -0.1 * sim  # Slight negative push
+                signed = -0.1 * sim * share  # Slight negative push
             else:
                 signed = 0.0
 
@@ -132,18 +140,19 @@ def aggregate_verdict(claim: str, evidence: List[Dict], verbose: bool = False) -
             "stance": stance,
             "stance_conf": conf,
             "weight": weight,
-            "signed": signed
+            "signed": signed,
+            "share": share,
         })
 
-        total_weight += abs(weight) if weight != 0 else 0.01  # Avoid zero division
+        total_weight += abs(weight) if weight != 0 else 0.01 * share  # Avoid zero division
         signed_sum += signed
 
     # Calculate average confidence
     if total_weight <= 1e-12:
-        support_count = sum(1 for it in breakdown["items"] if it["stance"] == "support")
-        contradict_count = sum(1 for it in breakdown["items"] if it["stance"] == "contradict")
-        neutral_count = sum(1 for it in breakdown["items"] if it["stance"] == "neutral")
-        total = max(1, len(breakdown["items"]))
+        support_count = _source_count([it for it in breakdown["items"] if it["stance"] == "support"])
+        contradict_count = _source_count([it for it in breakdown["items"] if it["stance"] == "contradict"])
+        neutral_count = _source_count([it for it in breakdown["items"] if it["stance"] == "neutral"])
+        total = max(1, _source_count(breakdown["items"]))
         
         # For factual claims with all neutral = lean toward FALSE
         if is_factual and neutral_count == total:
@@ -193,9 +202,10 @@ def aggregate_verdict(claim: str, evidence: List[Dict], verbose: bool = False) -
     top_support = pick_top(support_items)
     top_contradict = pick_top(contradict_items)
 
-    s_count = len(support_items)
-    c_count = len(contradict_items)
-    n_count = len(neutral_items)
+    # a cluster of syndicated copies counts as one source, same as its weight
+    s_count = _source_count(support_items)
+    c_count = _source_count(contradict_items)
+    n_count = _source_count(neutral_items)
 
     # === CLEAN SUMMARY GENERATION ===
     if raw_label == "True":
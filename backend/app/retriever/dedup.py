@@ -0,0 +1,84 @@
+# app/retriever/dedup.py
+"""
+Collapses near-duplicate snippets (syndicated wire stories re-published by
+many outlets) so stance detection runs once per cluster instead of once per
+publisher.
+
+Uses the embeddings attached by rank_snippets when present; otherwise falls
+back to MinHash over word shingles.
+"""
+
+import re
+import random
+import hashlib
+from typing import List, Dict
+
+import numpy as np
+
+from app.config import DEDUP_SIM_THRESHOLD, DEDUP_JACCARD_THRESHOLD
+
+SHINGLE_SIZE = 3
+NUM_PERM = 64
+_PRIME = (1 << 61) - 1
+_rng = random.Random(1)
+_PERMS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+
+def _shingles(text: str, k: int = SHINGLE_SIZE) -> set:
+    words = re.findall(r"\w+", (text or "").lower())
+    if len(words) < k:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + k]) for i in range(len(words) - k + 1)}
+
+
+def _minhash(text: str):
+    shingles = _shingles(text)
+    if not shingles:
+        return None
+    hashes = [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little") for s in shingles]
+    return [min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMS]
+
+
+def _minhash_sim(a, b) -> float:
+    if a is None or b is None:
+        return 0.0
+    return sum(1 for x, y in zip(a, b) if x == y) / NUM_PERM
+
+
+def _item_text(item: Dict) -> str:
+    return item.get("snippet") or item.get("text") or ""
+
+
+def collapse_duplicates(ranked: List[Dict], sim_threshold: float = DEDUP_SIM_THRESHOLD,
+                        jaccard_threshold: float = DEDUP_JACCARD_THRESHOLD) -> List[List[Dict]]:
+    """
+    Greedy clustering in rank order. Returns a list of clusters; the first
+    item of each cluster is its representative (the best-ranked member).
+    """
+    if not ranked:
+        return []
+
+    use_embeddings = all(r.get("embedding") is not None for r in ranked)
+    if use_embeddings:
+        embs = np.asarray([r["embedding"] for r in ranked], float)
+        embs = embs / (np.linalg.norm(embs, axis=1, keepdims=True) + 1e-12)
+    else:
+        sigs = [_minhash(_item_text(r)) for r in ranked]
+
+    clusters = []  # list of lists of indices into ranked
+    for i in range(len(ranked)):
+        placed = False
+        for members in clusters:
+            rep = members[0]
+            if use_embeddings:
+                same = float(embs[i] @ embs[rep]) >= sim_threshold
+            else:
+                same = _minhash_sim(sigs[i], sigs[rep]) >= jaccard_threshold
+            if same:
+                members.append(i)
+                placed = True
+                break
+        if not placed:
+            clusters.append([i])
+
+    return [[ranked[i] for i in members] for members in clusters]
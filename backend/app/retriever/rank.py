@@ -1,13 +1,15 @@
 # app/retriever/rank.py
 import numpy as np
-from app.models.embedder import Embedder
+from app.models.client import load_embedder
 
-embedder = Embedder()
+# in-process Embedder, or a thin client when USE_MODEL_SERVER=1
+embedder = load_embedder()
 
 async def rank_snippets(claim: str, candidates: list, top_k: int = 20):
     texts = [c.get("text", "") or "" for c in candidates]
 
     # Try embeddings
+    emb_texts = None
     try:
         emb_texts = np.asarray(embedder.embed_texts(texts), float)
         emb_claim = np.asarray(embedder.embed_texts([claim])[0], float)
@@ -18,6 +20,7 @@ async def rank_snippets(claim: str, candidates: list, top_k: int = 20):
         sims[valid] = (emb_texts[valid] @ emb_claim) / denom[valid]
 
     except Exception:
+        emb_texts = None
         sims = np.zeros(len(texts), float)
 
     # Fallback if degenerate
@@ -44,6 +47,9 @@ async def rank_snippets(claim: str, candidates: list, top_k: int = 20):
         item = candidates[int(i)].copy()
         item["score"] = float(norm[int(i)])
         item["raw_sim"] = float(sims[int(i)])
+        if emb_texts is not None:
+            # kept for near-duplicate collapse (app/retriever/dedup.py)
+            item["embedding"] = emb_texts[int(i)]
         top.append(item)
 
     return top
@@ -0,0 +1,135 @@
+# app/retriever/render.py
+"""
+Pooled headless Chromium (playwright) for JavaScript-rendered evidence pages.
+
+One long-lived browser is shared by the process. Pages are handed out from
+a pool of reusable contexts (at most RENDER_POOL_SIZE at a time), each
+recycled after RENDER_MAX_USES pages to bound memory. Images, fonts, media
+and common ad/tracker hosts are blocked.
+
+Only used by scrape.py as a fallback when static extraction yields too little text.
+Needs `playwright install chromium`.
+"""
+
+import asyncio
+from urllib.parse import urlparse
+
+from app.config import USER_AGENT, RENDER_POOL_SIZE, RENDER_MAX_USES, RENDER_TIMEOUT_MS
+
+BLOCKED_RESOURCE_TYPES = {"image", "font", "media"}
+AD_HOSTS = (
+    "doubleclick.net", "googlesyndication.com", "googleadservices.com", "adservice.google.com",
+    "googletagmanager.com", "google-analytics.com", "amazon-adsystem.com", "adnxs.com",
+    "taboola.com", "outbrain.com", "criteo.com", "criteo.net", "scorecardresearch.com",
+    "quantserve.com", "moatads.com", "pubmatic.com", "rubiconproject.com", "connect.facebook.net",
+)
+# after DOMContentLoaded, give client-side rendering this long to settle
+SETTLE_MS = 2000
+
+
+def _is_ad(url: str) -> bool:
+    host = (urlparse(url).hostname or "").lower()
+    return any(host == h or host.endswith("." + h) for h in AD_HOSTS)
+
+
+async def _route(route):
+    req = route.request
+    if req.resource_type in BLOCKED_RESOURCE_TYPES or _is_ad(req.url):
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+class BrowserPool:
+    def __init__(self, size: int = RENDER_POOL_SIZE, max_uses: int = RENDER_MAX_USES,
+                 timeout_ms: int = RENDER_TIMEOUT_MS):
+        self.size = max(1, size)
+        self.max_uses = max(1, max_uses)
+        self.timeout_ms = timeout_ms
+        self._pw = None
+        self._browser = None
+        self._idle = []  # reusable {"ctx", "page", "uses", "browser"} slots
+        self._sem = asyncio.Semaphore(self.size)
+        self._lock = asyncio.Lock()
+
+    async def _ensure_browser(self):
+        async with self._lock:
+            if self._browser is not None and self._browser.is_connected():
+                return
+            from playwright.async_api import async_playwright
+            if self._pw is None:
+                self._pw = await async_playwright().start()
+            self._browser = await self._pw.chromium.launch(headless=True)
+            self._idle = []  # slots of a crashed browser are dead
+
+    async def _new_slot(self) -> dict:
+        ctx = await self._browser.new_context(user_agent=USER_AGENT)
+        try:
+            await ctx.route("**/*", _route)
+            page = await ctx.new_page()
+        except BaseException:
+            await self._close_slot({"ctx": ctx})
+            raise
+        return {"ctx": ctx, "page": page, "uses": 0, "browser": self._browser}
+
+    @staticmethod
+    async def _close_slot(slot: dict):
+        try:
+            await slot["ctx"].close()
+        except Exception:
+            pass
+
+    async def render(self, url: str) -> str:
+        """Return the rendered HTML of `url`."""
+        await self._ensure_browser()
+        async with self._sem:
+            slot = self._idle.pop() if self._idle else await self._new_slot()
+            reusable = False
+            try:
+                page = slot["page"]
+                await page.goto(url, wait_until="domcontentloaded", timeout=self.timeout_ms)
+                try:
+                    await page.wait_for_load_state("networkidle", timeout=min(SETTLE_MS, self.timeout_ms))
+                except Exception:
+                    pass  # pages with long-polling never go idle; take what we have
+                html = await page.content()
+                reusable = True
+                return html
+            finally:
+                slot["uses"] += 1
+                alive = slot["browser"] is self._browser and self._browser.is_connected()
+                if reusable and alive and slot["uses"] < self.max_uses:
+                    self._idle.append(slot)
+                else:
+                    await self._close_slot(slot)
+
+    async def close(self):
+        for slot in self._idle:
+            await self._close_slot(slot)
+        self._idle = []
+        if self._browser is not None:
+            try:
+                await self._browser.close()
+            except Exception:
+                pass
+            self._browser = None
+        if self._pw is not None:
+            await self._pw.stop()
+            self._pw = None
+
+
+_pool = None
+
+
+async def render_html(url: str) -> str:
+    global _pool
+    if _pool is None:
+        _pool = BrowserPool()
+    return await _pool.render(url)
+
+
+async def close_pool():
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
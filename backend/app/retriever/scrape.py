@@ -1,12 +1,17 @@
 import re
+import logging
 from bs4 import BeautifulSoup
 import httpx
 from newspaper import Article
-from app.config import USER_AGENT
+from app.config import USER_AGENT, RENDER_ENABLED, RENDER_MIN_CHARS
+from app.retriever.render import render_html
+
+logger = logging.getLogger("uvicorn.error")
 
 async def fetch_raw_http(url: str) -> str:
     headers = {"User-Agent": USER_AGENT}
-    async with httpx.AsyncClient(timeout=15, headers=headers) as client:
+    # follow redirects: a 3xx would otherwise fail raise_for_status() and skip the render fallback
+    async with httpx.AsyncClient(timeout=15, headers=headers, follow_redirects=True) as client:
         r = await client.get(url)
         r.raise_for_status()
         return r.text
@@ -23,30 +28,57 @@ async def extract_with_newspaper(url: str):
     except Exception:
         return []
 
+def _paragraphs_from_html(html: str):
+    soup = BeautifulSoup(html, "html.parser")
+    ps = soup.find_all("p")
+    paras = []
+    for p in ps:
+        t = p.get_text().strip()
+        t = re.sub(r"\s+", " ", t)
+        if len(t) > 30:
+            paras.append(t)
+    return paras
+
+def _text_len(paras) -> int:
+    return sum(len(p) for p in paras or [])
+
 async def extract_paragraphs(url: str):
+    best = []
+    fetched = False  # only render pages that exist and are reachable
+
     # Try newspaper first (synchronous) — may block; call as wrapper
     try:
         paras = await extract_with_newspaper(url)
-        if paras:
+        if _text_len(paras) >= RENDER_MIN_CHARS:
             return paras
+        best = paras or []
+        fetched = bool(best)
     except Exception:
         pass
 
     # Fallback to http + bs4
     try:
         html = await fetch_raw_http(url)
+        fetched = True
+        paras = _paragraphs_from_html(html)
+        if _text_len(paras) >= RENDER_MIN_CHARS:
+            return paras
+        if _text_len(paras) > _text_len(best):
+            best = paras
     except Exception:
-        return []
+        pass
 
-    soup = BeautifulSoup(html, "html.parser")
-    ps = soup.find_all("p")
-    paras = []
-    for p in ps:
-        t = p.get_text().strip()
-        t = re.sub(r"\s+", " ", t)
-        if len(t) > 30:
-            paras.append(t)
-    return paras
+    # Page was fetched but static extraction came up short: likely JS-rendered.
+    # Dead/blocked URLs (404, 403, DNS) would just hold a browser slot until timeout.
+    if RENDER_ENABLED and fetched:
+        try:
+            paras = _paragraphs_from_html(await render_html(url))
+            if _text_len(paras) > _text_len(best):
+                best = paras
+        except Exception as e:
+            logger.debug("Render fallback failed for %s: %r", url, e)
+
+    return best
 
 # public wrapper
 async def fetch_and_extract(url: str):
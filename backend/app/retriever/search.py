@@ -1,48 +1,224 @@
-import os
+import re
+import time
+import asyncio
+import logging
+from urllib.parse import urlparse, parse_qs
 import httpx
-from app.config import SERPAPI_KEY, BING_API_KEY, USER_AGENT, MAX_URLS
-from urllib.parse import urlencode
+from app.config import (
+    SERPAPI_KEY, BING_API_KEY, USER_AGENT, MAX_URLS,
+    SEARCH_HEDGE_DELAY_MS, SEARCH_MERGE, SEARCH_MERGE_GRACE_MS,
+)
 
-# Minimal SerpAPI usage (if you have SERPAPI_KEY). If not, use Bing (BING_API_KEY).
+# Providers: SerpAPI (SERPAPI_KEY), Bing (BING_API_KEY), DuckDuckGo HTML (only without either key; unreliable).
 SERPAPI_URL = "https://serpapi.com/search.json"
 BING_SEARCH_URL = "https://api.bing.microsoft.com/v7.0/search"
+DDG_HTML_URL = "https://duckduckgo.com/html/"
 
-async def search_urls(query: str, num: int = 5):
-    headers = {"User-Agent": USER_AGENT}
-    urls = []
-    if SERPAPI_KEY:
+logger = logging.getLogger("uvicorn.error")
+
+
+class ProviderStats:
+    """Moving latency / error / empty-result profile of one provider (EWMA)."""
+
+    ALPHA = 0.2
+    ERROR_PENALTY_S = 5.0  # seconds added at 100% errors, so fast failures don't look cheap
+    EMPTY_PENALTY_S = 5.0  # same for empty results: search_urls() moves on from them too
+
+    def __init__(self, prior_latency: float):
+        self.latency = prior_latency
+        self.error_rate = 0.0
+        self.empty_rate = 0.0
+        self.samples = 0
+
+    def record(self, latency: float, ok: bool, empty: bool = False):
+        a = self.ALPHA if self.samples else 1.0
+        self.latency = (1 - a) * self.latency + a * latency
+        self.error_rate = (1 - a) * self.error_rate + a * (0.0 if ok else 1.0)
+        if ok:
+            self.empty_rate = (1 - a) * self.empty_rate + a * (1.0 if empty else 0.0)
+        self.samples += 1
+
+    def record_lower_bound(self, elapsed: float):
+        # a cancelled request only tells us latency >= elapsed: it may raise the
+        # estimate but never lower it, and says nothing about errors
+        if elapsed > self.latency:
+            self.latency = (1 - self.ALPHA) * self.latency + self.ALPHA * elapsed
+
+    def cost(self) -> float:
+        return self.latency + self.ERROR_PENALTY_S * self.error_rate + self.EMPTY_PENALTY_S * self.empty_rate
+
+
+class SearchProvider:
+    name = ""
+    prior_latency = 1.0  # seconds; sets the initial priority order
+
+    def __init__(self):
+        self.stats = ProviderStats(self.prior_latency)
+
+    def enabled(self) -> bool:
+        return True
+
+    async def search(self, client: httpx.AsyncClient, query: str, num: int) -> list:
+        raise NotImplementedError
+
+
+class SerpApiProvider(SearchProvider):
+    name = "serpapi"
+    prior_latency = 1.0
+
+    def enabled(self):
+        return bool(SERPAPI_KEY)
+
+    async def search(self, client, query, num):
         params = {"q": query, "api_key": SERPAPI_KEY, "num": num}
-        async with httpx.AsyncClient(timeout=20, headers=headers) as client:
-            r = await client.get(SERPAPI_URL, params=params)
-            r.raise_for_status()
-            data = r.json()
+        r = await client.get(SERPAPI_URL, params=params)
+        r.raise_for_status()
+        data = r.json()
+        urls = []
         for item in data.get("organic_results", []):
             u = item.get("link") or item.get("url")
             if u:
                 urls.append(u)
-                if len(urls) >= num:
-                    break
-    elif BING_API_KEY:
-        headers["Ocp-Apim-Subscription-Key"] = BING_API_KEY
+        return urls
+
+
+class BingProvider(SearchProvider):
+    name = "bing"
+    prior_latency = 1.2
+
+    def enabled(self):
+        return bool(BING_API_KEY)
+
+    async def search(self, client, query, num):
+        headers = {"Ocp-Apim-Subscription-Key": BING_API_KEY}
         params = {"q": query, "count": num}
-        async with httpx.AsyncClient(timeout=20, headers=headers) as client:
-            r = await client.get(BING_SEARCH_URL, params=params)
-            r.raise_for_status()
-            data = r.json()
+        r = await client.get(BING_SEARCH_URL, params=params, headers=headers)
+        r.raise_for_status()
+        data = r.json()
         # Bing returns webPages.value
-        for item in data.get("webPages", {}).get("value", []):
-            urls.append(item.get("url"))
-            if len(urls) >= num:
-                break
-    else:
-        # Fallback: basic DuckDuckGo HTML scraping via ddg (httpx) — light and unreliable
-        async with httpx.AsyncClient(timeout=20, headers=headers) as client:
-            r = await client.get(f"https://duckduckgo.com/html/?q={query}")
-            if r.status_code == 200:
-                text = r.text
-                # extract links naively (not robust)
-                import re
-                matches = re.findall(r'<a rel="nofollow" class="result__a" href="(.*?)"', text)
-                for m in matches[:num]:
-                    urls.append(m)
-    return urls[:num]
\ No newline at end of file
+        return [item.get("url") for item in data.get("webPages", {}).get("value", []) if item.get("url")]
+
+
+def _ddg_url(href: str):
+    """Resolve a DDG result link (often //duckduckgo.com/l/?uddg=<target>) to an article URL, or None."""
+    href = href.replace("&amp;", "&")
+    if href.startswith("//"):
+        href = "https:" + href
+    parsed = urlparse(href)
+    if parsed.netloc.endswith("duckduckgo.com"):
+        target = parse_qs(parsed.query).get("uddg")
+        if not target:
+            return None
+        parsed = urlparse(target[0])
+    if parsed.scheme not in ("http", "https") or not parsed.netloc or parsed.netloc.endswith("duckduckgo.com"):
+        return None
+    return parsed.geturl()
+
+
+class DuckDuckGoProvider(SearchProvider):
+    # basic DuckDuckGo HTML scraping — light and unreliable, so it's only a
+    # fallback for setups without a search API key, never raced against one
+    name = "duckduckgo"
+    prior_latency = 2.0
+
+    def enabled(self):
+        return not (SERPAPI_KEY or BING_API_KEY)
+
+    async def search(self, client, query, num):
+        r = await client.get(DDG_HTML_URL, params={"q": query})
+        r.raise_for_status()
+        # extract links naively (not robust); ads and the bot wall resolve to nothing
+        hrefs = re.findall(r'<a rel="nofollow" class="result__a" href="(.*?)"', r.text)
+        return [u for u in map(_ddg_url, hrefs) if u]
+
+
+PROVIDERS = [SerpApiProvider(), BingProvider(), DuckDuckGoProvider()]
+
+
+async def _timed_search(provider: SearchProvider, client: httpx.AsyncClient, query: str, num: int) -> list:
+    start = time.perf_counter()
+    try:
+        urls = await provider.search(client, query, num)
+    except asyncio.CancelledError:
+        # lost the race
+        provider.stats.record_lower_bound(time.perf_counter() - start)
+        raise
+    except Exception as e:
+        # exceptions, incl. non-2xx via raise_for_status(), are the only errors
+        provider.stats.record(time.perf_counter() - start, ok=False)
+        logger.warning("Search provider %s failed: %r", provider.name, e)
+        return []
+    # not an error, but search_urls() treats it as a miss, so the profile must too
+    provider.stats.record(time.perf_counter() - start, ok=True, empty=not urls)
+    return urls
+
+
+def _dedupe(urls: list) -> list:
+    seen = set()
+    out = []
+    for u in urls:
+        if u and u not in seen:
+            seen.add(u)
+            out.append(u)
+    return out
+
+
+async def search_urls(query: str, num: int = 5):
+    """
+    Hedged search: start the provider with the best latency/error profile,
+    start the next one if it hasn't answered within SEARCH_HEDGE_DELAY_MS
+    (or as soon as it fails), and return the first non-empty result,
+    cancelling the rest. With SEARCH_MERGE, results arriving within
+    SEARCH_MERGE_GRACE_MS of the first good one are merged in.
+    """
+    queue = sorted((p for p in PROVIDERS if p.enabled()), key=lambda p: p.stats.cost())
+    hedge_delay = SEARCH_HEDGE_DELAY_MS / 1000.0
+    pending = {}
+    merged = []
+    merge_deadline = None
+
+    async with httpx.AsyncClient(timeout=20, headers={"User-Agent": USER_AGENT}) as client:
+        def launch():
+            p = queue.pop(0)
+            pending[asyncio.ensure_future(_timed_search(p, client, query, num))] = p
+
+        try:
+            launch()
+            while pending:
+                if merge_deadline is not None:
+                    timeout = max(0.0, merge_deadline - time.monotonic())
+                elif queue:
+                    timeout = hedge_delay
+                else:
+                    timeout = None
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    if merge_deadline is not None:
+                        break
+                    launch()  # primary is slow: hedge with the next provider
+                    continue
+
+                failed = False
+                for t in done:
+                    pending.pop(t)
+                    urls = t.result()
+                    if not urls:
+                        failed = True
+                        continue
+                    merged.extend(urls)
+                    if not SEARCH_MERGE:
+                        return _dedupe(merged)[:num]
+                    if merge_deadline is None:
+                        merge_deadline = time.monotonic() + SEARCH_MERGE_GRACE_MS / 1000.0
+
+                # a provider failed or came back empty: don't wait out the hedge delay
+                if failed and merge_deadline is None and queue:
+                    launch()
+        finally:
+            for t in pending:
+                t.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    return _dedupe(merged)[:num]
@@ -7,6 +7,8 @@ from pydantic import BaseModel, ValidationError
 from dotenv import load_dotenv
 from groq import Groq
 
+from app.utils.replay import replayable
+
 load_dotenv()
 
 MODEL_NAME = "llama-3.1-8b-instant"
@@ -39,9 +41,30 @@ class StanceResponse(BaseModel):
     explanation: str
 
 
-client = Groq()  # <-- KEY CHANGE (uses env automatically)
+# fallback explanations for failed calls; never recorded for replay
+INVALID_RESPONSE = "Invalid model response."
+SERVICE_UNAVAILABLE = "Stance service unavailable."
+REPLAY_MISS = "No recorded stance response (replay miss)."
+
+_client = None
+
+
+def get_client() -> Groq:
+    # built on first use, so offline replay runs without a Groq key
+    global _client
+    if _client is None:
+        _client = Groq()  # uses GROQ_API_KEY from env
+    return _client
 
 
+@replayable(
+    "stance",
+    lambda claim, evidence: {"model": MODEL_NAME, "claim": claim, "evidence": evidence},
+    encode=lambda r: r.dict(),
+    decode=lambda d: StanceResponse(**d),
+    should_store=lambda r: r.explanation not in (INVALID_RESPONSE, SERVICE_UNAVAILABLE),
+    on_miss=lambda claim, evidence: StanceResponse(stance="neutral", confidence=0.0, explanation=REPLAY_MISS),
+)
 def detect_stance(claim: str, evidence: str) -> StanceResponse:
     if not claim or not evidence:
         return StanceResponse(
@@ -51,7 +74,7 @@ def detect_stance(claim: str, evidence: str) -> StanceResponse:
         )
 
     try:
-        response = client.chat.completions.create(
+        response = get_client().chat.completions.create(
             model=MODEL_NAME,
             temperature=0,
             max_tokens=256,
@@ -74,7 +97,7 @@ def detect_stance(claim: str, evidence: str) -> StanceResponse:
         return StanceResponse(
             stance="neutral",
             confidence=0.0,
-            explanation="Invalid model response."
+            explanation=INVALID_RESPONSE
         )
 
     except Exception as e:
@@ -82,5 +105,5 @@ def detect_stance(claim: str, evidence: str) -> StanceResponse:
         return StanceResponse(
             stance="neutral",
             confidence=0.0,
-            explanation="Stance service unavailable."
+            explanation=SERVICE_UNAVAILABLE
         )
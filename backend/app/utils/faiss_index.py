@@ -1,52 +1,195 @@
 # app/utils/faiss_index.py
-import os, json, faiss, numpy as np
-from sentence_transformers import SentenceTransformer
+import os, json, logging, sqlite3, faiss, numpy as np
 from pathlib import Path
 MODEL = "sentence-transformers/all-MiniLM-L6-v2"
 EMB_DIM = 384  # depends on model
 INDEX_DIR = Path("data/faiss")
-INDEX_FILE = INDEX_DIR / "index.faiss"
-META_FILE = INDEX_DIR / "meta.json"
+
+logger = logging.getLogger("uvicorn.error")
+
+class SqliteMeta:
+    """
+    Append-only doc metadata keyed by vector id, for corpora too large to keep
+    as an in-memory list / rewrite as one JSON file (see app/utils/ingest.py).
+    Also holds content hashes for dedupe and small bits of state (checkpoints),
+    so rows, hashes and checkpoint commit in one transaction.
+    """
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(str(path), check_same_thread=False)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (id INTEGER PRIMARY KEY, doc TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS hashes (hash BLOB PRIMARY KEY) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+        """)
+
+    def __len__(self):
+        row = self.conn.execute("SELECT MAX(id) FROM meta").fetchone()
+        return 0 if row[0] is None else row[0] + 1
+
+    def get(self, vid):
+        row = self.conn.execute("SELECT doc FROM meta WHERE id = ?", (int(vid),)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, start_id, docs):
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO meta (id, doc) VALUES (?, ?)",
+            ((start_id + i, json.dumps(d, ensure_ascii=False, separators=(",", ":"))) for i, d in enumerate(docs)),
+        )
+
+    def has_hash(self, h) -> bool:
+        return self.conn.execute("SELECT 1 FROM hashes WHERE hash = ?", (h,)).fetchone() is not None
+
+    def add_hashes(self, hashes):
+        self.conn.executemany("INSERT OR IGNORE INTO hashes (hash) VALUES (?)", ((h,) for h in hashes))
+
+    def get_state(self, key, default=None):
+        row = self.conn.execute("SELECT value FROM state WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set_state(self, key, value):
+        self.conn.execute("INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+
+    def commit(self):
+        self.conn.commit()
+
+    def rollback(self):
+        self.conn.rollback()
+
+    def close(self):
+        self.conn.close()
+
 
 class FaissIndex:
-    def __init__(self, model_name=MODEL):
-        self.model = SentenceTransformer(model_name)
-        INDEX_DIR.mkdir(parents=True, exist_ok=True)
-        if INDEX_FILE.exists() and META_FILE.exists():
-            self.index = faiss.read_index(str(INDEX_FILE))
-            with open(META_FILE, "r", encoding="utf-8") as f:
-                self.meta = json.load(f)  # list of {url, text, publisher}
+    def __init__(self, model_name=MODEL, index_dir=INDEX_DIR, embedder=None):
+        """
+        embedder: optional object with embed_texts() (e.g. app.models.client.load_embedder()).
+        When given, no SentenceTransformer is loaded (or even imported) here.
+        If index_dir holds a meta.sqlite (built by app.utils.ingest), metadata is
+        read from it by vector id instead of being loaded into memory.
+        """
+        self.embedder = embedder
+        self.model = None
+        if embedder is None:
+            # imported lazily: API workers pass the model-server client and never need torch
+            from sentence_transformers import SentenceTransformer
+            self.model = SentenceTransformer(model_name)
+        self.index_dir = Path(index_dir)
+        self.index_file = self.index_dir / "index.faiss"
+        self.meta_file = self.index_dir / "meta.json"
+        self.meta_db_file = self.index_dir / "meta.sqlite"
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        self.index = faiss.IndexFlatIP(EMB_DIM)  # cosine via normalized vectors
+        self.meta = []  # list of {url, text, publisher}, or a SqliteMeta
+        if self.meta_db_file.exists():
+            self.meta = SqliteMeta(self.meta_db_file)
+            if self.index_file.exists():
+                # vector ids key the meta rows; ids without a row are skipped in search()
+                self.index = faiss.read_index(str(self.index_file))
+        elif self.index_file.exists() and self.meta_file.exists():
+            try:
+                index = faiss.read_index(str(self.index_file))
+                with open(self.meta_file, "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+                if index.ntotal != len(meta):
+                    raise ValueError(f"index has {index.ntotal} vectors but meta has {len(meta)} entries")
+                self.index, self.meta = index, meta
+            except Exception as e:
+                # keep the bad files for inspection instead of overwriting them on the next save
+                logger.warning("Unreadable FAISS index in %s (%r); starting empty", self.index_dir, e)
+                for p in (self.index_file, self.meta_file):
+                    if p.exists():
+                        p.replace(p.with_name(p.name + ".corrupt"))
+
+    def encode(self, texts):
+        if self.embedder is not None:
+            embs = np.asarray(self.embedder.embed_texts(texts))
         else:
-            self.index = faiss.IndexFlatIP(EMB_DIM)  # cosine via normalized vectors
-            self.meta = []
+            embs = self.model.encode(texts, convert_to_numpy=True, show_progress_bar=False)
+        # normalize for inner product cosine
+        norms = np.linalg.norm(embs, axis=1, keepdims=True) + 1e-10
+        return (embs / norms).astype("float32")
 
-    def add_docs(self, docs):
+    def add_docs(self, docs, save=True):
         """
         docs: list of {'url':..., 'text':..., 'publisher':...}
         """
         texts = [d["text"] for d in docs]
-        embs = self.model.encode(texts, convert_to_numpy=True, show_progress_bar=False)
-        # normalize for inner product cosine
-        norms = np.linalg.norm(embs, axis=1, keepdims=True) + 1e-10
-        embs = embs / norms
-        self.index.add(np.array(embs).astype("float32"))
+        self.add_embeddings(docs, self.encode(texts), save=save)
+
+    def add_embeddings(self, docs, embs, save=True):
+        """
+        Add docs with precomputed, already-normalized embeddings (e.g. from app.utils.ingest).
+        """
+        if isinstance(self.meta, SqliteMeta):
+            # vectors.f32 + meta.sqlite are owned by app.utils.ingest; adding here would desync them
+            raise NotImplementedError("add to a bulk-loaded corpus with app.utils.ingest, not add_docs()")
         self.meta.extend(docs)
-        self.save()
+        self.index.add(np.asarray(embs, dtype="float32"))
+        if save:
+            self.save()
 
     def search(self, query, top_k=10):
-        q_emb = self.model.encode([query], convert_to_numpy=True)
-        q_emb = q_emb / (np.linalg.norm(q_emb, axis=1, keepdims=True) + 1e-10)
-        D, I = self.index.search(q_emb.astype("float32"), top_k)
+        D, I = self.index.search(self.encode([query]), top_k)
         results = []
         for score, idx in zip(D[0], I[0]):
-            if idx < 0 or idx >= len(self.meta): 
+            m = self._meta_at(int(idx))
+            if m is None:
                 continue
-            m = self.meta[idx].copy()
+            m = m.copy()
             m["score"] = float(score)
+            m["pos"] = int(idx)
             results.append(m)
         return results
 
+    def _meta_at(self, idx):
+        if isinstance(self.meta, SqliteMeta):
+            return self.meta.get(idx) if idx >= 0 else None
+        return self.meta[idx] if 0 <= idx < len(self.meta) else None
+
+    def remove(self, positions, save=True):
+        """
+        Drop entries by position. IndexFlat compacts in order on removal,
+        so meta is compacted the same way to stay aligned.
+        """
+        if isinstance(self.meta, SqliteMeta):
+            raise NotImplementedError("remove() needs list meta; the bulk-loaded corpus is append-only")
+        positions = sorted({int(p) for p in positions if 0 <= int(p) < len(self.meta)})
+        if not positions:
+            return
+        self.index.remove_ids(np.asarray(positions, dtype="int64"))
+        drop = set(positions)
+        self.meta = [m for i, m in enumerate(self.meta) if i not in drop]
+        if save:
+            self.save()
+
     def save(self):
-        faiss.write_index(self.index, str(INDEX_FILE))
-        with open(META_FILE, "w", encoding="utf-8") as f:
-            json.dump(self.meta, f, ensure_ascii=False, indent=2)
+        if isinstance(self.meta, SqliteMeta):
+            # read-only here: app.utils.ingest writes the bulk-loaded corpus
+            return
+        self.write_files(self.index, self.meta)
+
+    def write_files(self, index, meta):
+        """
+        Atomically write an index + meta (temp file, then os.replace),
+        so a crash or a concurrent writer never leaves a truncated file behind.
+        Split from save() so callers can snapshot under a lock and write outside it.
+        """
+        meta_tmp = self.meta_file.with_name(self.meta_file.name + f".tmp{os.getpid()}")
+        with open(meta_tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, separators=(",", ":"))
+        write_index_atomic(index, self.index_file)
+        os.replace(meta_tmp, self.meta_file)
+
+
+def write_index_atomic(index, path):
+    """
+    Write a faiss index to path via a temp file + os.replace. faiss.write_index
+    streams to the file, so no serialized copy of the index is held in memory.
+    """
+    path = Path(path)
+    tmp = path.with_name(path.name + f".tmp{os.getpid()}")
+    faiss.write_index(index, str(tmp))
+    with open(tmp, "rb") as f:
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
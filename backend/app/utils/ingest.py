@@ -0,0 +1,317 @@
+# app/utils/ingest.py
+"""
+Streaming bulk ingestion into the FaissIndex corpus.
+
+    python -m app.utils.ingest archive.jsonl more.csv --workers 8
+
+Input is read in chunks of --chunk-size records, cleaned with clean_text,
+deduplicated by URL and content hash (against the corpus too), encoded with
+a multi-process SentenceTransformer pool and appended chunk by chunk:
+
+- vectors go to an append-only vectors.f32 file,
+- doc metadata, dedupe hashes and the checkpoint go to meta.sqlite, keyed
+  by vector id, and commit together in one transaction,
+
+so memory is bounded by the chunk size and each checkpoint only writes the
+new rows. index.faiss is built once from vectors.f32 at the end and swapped
+in atomically. Re-running the same command resumes after the last
+checkpoint; malformed records are skipped and counted.
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import hashlib
+import argparse
+import resource
+from pathlib import Path
+
+import faiss
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+from app.utils.faiss_index import SqliteMeta, MODEL, INDEX_DIR, write_index_atomic
+from app.utils.textclean import clean_text
+
+VECTORS_FILE = "vectors.f32"
+BUILD_ROWS = 65536  # vectors read per step when building index.faiss
+
+
+def _digest(kind: str, value: str) -> bytes:
+    return hashlib.blake2b(f"{kind}:{value}".encode("utf-8"), digest_size=16).digest()
+
+
+def _doc_keys(doc: dict):
+    keys = [_digest("text", doc["text"].lower())]
+    if doc.get("url"):
+        keys.append(_digest("url", doc["url"]))
+    return keys
+
+
+def read_records(path: str, fmt: str = "auto"):
+    """Yield records (dicts) from a JSONL or CSV file, one at a time; None for a malformed one."""
+    if fmt == "auto":
+        fmt = "csv" if path.lower().endswith(".csv") else "jsonl"
+    with open(path, "r", encoding="utf-8", errors="replace", newline="") as f:
+        if fmt == "csv":
+            csv.field_size_limit(sys.maxsize)
+            reader = csv.DictReader(f)
+            while True:
+                try:
+                    yield next(reader)
+                except StopIteration:
+                    return
+                except csv.Error:
+                    yield None
+        else:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    rec = json.loads(line)
+                except json.JSONDecodeError:
+                    rec = None
+                yield rec if isinstance(rec, dict) else None
+
+
+def _chunks(records, size: int):
+    chunk = []
+    for rec in records:
+        chunk.append(rec)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class RssSampler:
+    """
+    Peak RSS of this process plus the live encoder workers. RUSAGE_CHILDREN
+    only covers reaped children, so workers are sampled from /proc (VmHWM).
+    """
+
+    def __init__(self, pids=()):
+        self.pids = list(pids)
+        self.child_peaks_kb = {}
+
+    @staticmethod
+    def _vmhwm_kb(pid: int) -> int:
+        try:
+            with open(f"/proc/{pid}/status", "r") as f:
+                for line in f:
+                    if line.startswith("VmHWM:"):
+                        return int(line.split()[1])
+        except OSError:
+            pass
+        return 0
+
+    def peak_mb(self) -> float:
+        for pid in self.pids:
+            self.child_peaks_kb[pid] = max(self.child_peaks_kb.get(pid, 0), self._vmhwm_kb(pid))
+        # ru_maxrss is KB on Linux, bytes on macOS
+        own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        own_kb = own / 1024 if sys.platform == "darwin" else own
+        return (own_kb + sum(self.child_peaks_kb.values())) / 1024
+
+
+class VectorLog:
+    """Append-only float32 matrix on disk; rows past the last checkpoint are discarded on open."""
+
+    def __init__(self, path: Path, dim: int, committed_rows: int):
+        self.path = path
+        self.dim = dim
+        self.row_bytes = dim * 4
+        self.f = open(path, "ab+")
+        self.f.truncate(committed_rows * self.row_bytes)
+        self.f.seek(0, os.SEEK_END)
+        self.rows = committed_rows
+
+    def append(self, embs: np.ndarray):
+        self.f.write(np.ascontiguousarray(embs, dtype="float32").tobytes())
+        self.rows += len(embs)
+
+    def sync(self):
+        self.f.flush()
+        os.fsync(self.f.fileno())
+
+    def close(self):
+        self.f.close()
+
+
+class Ingestor:
+    def __init__(self, index_dir: Path, model_name: str, workers: int, batch_size: int,
+                 text_field: str, url_field: str, publisher_field: str):
+        self.index_dir = index_dir
+        self.batch_size = batch_size
+        self.text_field = text_field
+        self.url_field = url_field
+        self.publisher_field = publisher_field
+        self.bad = 0
+
+        index_dir.mkdir(parents=True, exist_ok=True)
+        self.model = SentenceTransformer(model_name)
+        self.dim = int(self.model.get_sentence_embedding_dimension())
+        self.meta = SqliteMeta(index_dir / "meta.sqlite")
+        stored_dim = self.meta.get_state("dim")
+        if stored_dim is not None and stored_dim != self.dim:
+            raise SystemExit(f"{index_dir} holds {stored_dim}-d vectors but {model_name} produces {self.dim}-d")
+        self.meta.set_state("dim", self.dim)
+        self.vectors = VectorLog(index_dir / VECTORS_FILE, self.dim, self.meta.get_state("vectors_rows", 0))
+        self._migrate_json_index()
+
+        self.pool = None
+        if workers > 1:
+            self.pool = self.model.start_multi_process_pool(target_devices=["cpu"] * workers)
+        self.rss = RssSampler(p.pid for p in (self.pool or {}).get("processes", []))
+
+    def _migrate_json_index(self):
+        # a corpus built with FaissIndex.add_docs() becomes the first rows of the append-only store
+        index_file, meta_file = self.index_dir / "index.faiss", self.index_dir / "meta.json"
+        if self.vectors.rows or not (index_file.exists() and meta_file.exists()):
+            return
+        index = faiss.read_index(str(index_file))
+        with open(meta_file, "r", encoding="utf-8") as f:
+            docs = json.load(f)
+        n = min(index.ntotal, len(docs))
+        if n:
+            self.vectors.append(index.reconstruct_n(0, n))
+            self.meta.put(0, docs[:n])
+            self.meta.add_hashes(k for d in docs[:n] if d.get("text") for k in _doc_keys(d))
+        self.checkpoint({})
+        meta_file.replace(meta_file.with_name(meta_file.name + ".migrated"))
+        print(f"Migrated {n} docs from {meta_file}")
+
+    def close(self):
+        if self.pool is not None:
+            self.model.stop_multi_process_pool(self.pool)
+            self.pool = None
+        self.vectors.close()
+        self.meta.close()
+
+    def _prepare(self, records):
+        docs, keys = [], []
+        pending = set()  # hashes within this chunk, not yet in the table
+        for rec in records:
+            if rec is None:
+                self.bad += 1
+                continue
+            text = clean_text(str(rec.get(self.text_field) or ""))
+            if not text:
+                continue
+            doc = {
+                "url": (rec.get(self.url_field) or None),
+                "text": text,
+                "publisher": (rec.get(self.publisher_field) or None),
+            }
+            doc_keys = _doc_keys(doc)
+            if any(k in pending or self.meta.has_hash(k) for k in doc_keys):
+                continue
+            pending.update(doc_keys)
+            keys.extend(doc_keys)
+            docs.append(doc)
+        return docs, keys
+
+    def _encode(self, texts):
+        if self.pool is not None:
+            embs = self.model.encode_multi_process(texts, self.pool, batch_size=self.batch_size)
+        else:
+            embs = self.model.encode(texts, batch_size=self.batch_size, convert_to_numpy=True, show_progress_bar=False)
+        embs = np.asarray(embs, dtype="float32")
+        return embs / (np.linalg.norm(embs, axis=1, keepdims=True) + 1e-10)
+
+    def add_chunk(self, records) -> int:
+        docs, keys = self._prepare(records)
+        if docs:
+            embs = self._encode([d["text"] for d in docs])
+            self.meta.put(self.vectors.rows, docs)  # vector id == row in vectors.f32
+            self.meta.add_hashes(keys)
+            self.vectors.append(embs)
+        return len(docs)
+
+    def checkpoint(self, inputs: dict):
+        # vectors hit the disk before the transaction that makes them count
+        self.vectors.sync()
+        self.meta.set_state("vectors_rows", self.vectors.rows)
+        self.meta.set_state("inputs", inputs)
+        self.meta.commit()
+
+    def build_index(self) -> int:
+        """Build index.faiss from vectors.f32 in bounded steps and swap it in atomically."""
+        index = faiss.IndexFlatIP(self.dim)  # cosine via normalized vectors
+        rows = self.vectors.rows
+        if rows:
+            mm = np.memmap(self.vectors.path, dtype="float32", mode="r", shape=(rows, self.dim))
+            for start in range(0, rows, BUILD_ROWS):
+                index.add(np.ascontiguousarray(mm[start:start + BUILD_ROWS]))
+            del mm
+        write_index_atomic(index, self.index_dir / "index.faiss")
+        return index.ntotal
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Stream JSONL/CSV documents into the FaissIndex corpus")
+    ap.add_argument("inputs", nargs="+")
+    ap.add_argument("--format", choices=["auto", "jsonl", "csv"], default="auto")
+    ap.add_argument("--index-dir", default=str(INDEX_DIR))
+    ap.add_argument("--model", default=MODEL)
+    ap.add_argument("--chunk-size", type=int, default=4096, help="records read/encoded/added at a time")
+    ap.add_argument("--batch-size", type=int, default=64, help="encoder batch size")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="encoder processes; 1 = in-process")
+    ap.add_argument("--checkpoint-every", type=int, default=50000, help="docs added between checkpoints")
+    ap.add_argument("--text-field", default="text")
+    ap.add_argument("--url-field", default="url")
+    ap.add_argument("--publisher-field", default="publisher")
+    ap.add_argument("--restart", action="store_true", help="re-read inputs from the start (duplicates are still skipped)")
+    args = ap.parse_args(argv)
+
+    ingestor = Ingestor(Path(args.index_dir), args.model, args.workers, args.batch_size,
+                        args.text_field, args.url_field, args.publisher_field)
+    inputs = {} if args.restart else dict(ingestor.meta.get_state("inputs", {}))
+    start = time.perf_counter()
+    read_total = added_total = since_ckpt = 0
+
+    try:
+        for path in args.inputs:
+            key = str(Path(path).resolve())
+            done = int(inputs.get(key, 0))
+            records = read_records(path, args.format)
+            for _ in range(done):  # resume: skip what the checkpoint already covers
+                next(records, None)
+
+            for chunk in _chunks(records, args.chunk_size):
+                added = ingestor.add_chunk(chunk)
+                done += len(chunk)
+                read_total += len(chunk)
+                added_total += added
+                since_ckpt += added
+                inputs[key] = done
+
+                if since_ckpt >= args.checkpoint_every:
+                    ingestor.checkpoint(inputs)
+                    since_ckpt = 0
+
+                elapsed = time.perf_counter() - start
+                print(f"[{Path(path).name}] read={read_total} added={added_total} bad={ingestor.bad} "
+                      f"docs/sec={added_total / max(elapsed, 1e-9):.1f} "
+                      f"peak_rss={ingestor.rss.peak_mb():.0f}MB", flush=True)
+
+        ingestor.checkpoint(inputs)
+        ntotal = ingestor.build_index()
+        peak = ingestor.rss.peak_mb()
+    finally:
+        ingestor.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"Done: read {read_total}, added {added_total}, malformed {ingestor.bad}, "
+          f"skipped {read_total - added_total - ingestor.bad} empty/duplicate in {elapsed:.1f}s; "
+          f"{added_total / max(elapsed, 1e-9):.1f} docs/sec; peak RSS {peak:.0f}MB "
+          f"(this process + encoder workers); index size {ntotal}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,213 @@
+# app/utils/refresh.py
+"""
+Stale-while-revalidate verdict store with a background refresher for hot claims.
+
+- age < soft_ttl:            serve the stored verdict
+- soft_ttl <= age < hard_ttl: serve it anyway and re-run the pipeline in the background
+- older / unknown:           caller computes; concurrent misses share one pipeline run
+
+A scheduler tick proactively refreshes the top-N most popular claims before
+they go stale. Background work (both kinds) is capped by an hourly SerpAPI /
+Groq call budget; when it runs out, stale verdicts are served until hard_ttl.
+
+State is per process, so each uvicorn worker tracks its own hot set.
+"""
+
+import time
+import asyncio
+import logging
+
+from app.config import (
+    SWR_SOFT_TTL,
+    SWR_HARD_TTL,
+    SWR_TOP_N,
+    SWR_INTERVAL,
+    SWR_HALF_LIFE,
+    SWR_MAX_TRACKED,
+    SWR_SERP_BUDGET_PER_HOUR,
+    SWR_GROQ_BUDGET_PER_HOUR,
+)
+
+logger = logging.getLogger("uvicorn.error")
+
+# refresh hot claims once they reach this fraction of soft_ttl
+REFRESH_AHEAD = 0.8
+
+
+class _HourlyBudget:
+    """Token bucket refilled continuously at `per_hour`."""
+
+    def __init__(self, per_hour: int):
+        self.capacity = float(max(0, per_hour))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.capacity / 3600.0)
+        self.updated = now
+
+    def available(self, amount: float) -> bool:
+        self._refill()
+        return self.tokens >= amount
+
+    def spend(self, amount: float):
+        self._refill()
+        self.tokens = max(0.0, self.tokens - amount)
+
+
+class ClaimRefresher:
+    def __init__(self, compute, soft_ttl: int = SWR_SOFT_TTL, hard_ttl: int = SWR_HARD_TTL,
+                 top_n: int = SWR_TOP_N, interval: int = SWR_INTERVAL, half_life: int = SWR_HALF_LIFE,
+                 max_tracked: int = SWR_MAX_TRACKED, serp_budget: int = SWR_SERP_BUDGET_PER_HOUR,
+                 groq_budget: int = SWR_GROQ_BUDGET_PER_HOUR, should_store=lambda r: True):
+        """
+        compute: async fn(claim) -> verdict dict (the full pipeline).
+        should_store: verdicts it rejects are returned but not kept.
+        """
+        self.compute = compute
+        self.should_store = should_store
+        self.soft_ttl = soft_ttl
+        self.hard_ttl = max(hard_ttl, soft_ttl)
+        self.top_n = top_n
+        self.interval = interval
+        self.half_life = half_life
+        self.max_tracked = max_tracked
+        self.serp_budget = _HourlyBudget(serp_budget)
+        self.groq_budget = _HourlyBudget(groq_budget)
+        self.groq_per_run = 10.0  # running estimate of stance calls per pipeline run
+        self.entries = {}  # key -> {claim, result, fetched_at, score, seen_at}
+        self.inflight = {}  # key -> asyncio.Task
+        self.stats_counts = {"fresh": 0, "stale": 0, "miss": 0, "refreshes": 0, "budget_skips": 0}
+        self._task = None
+
+    @staticmethod
+    def key(claim: str) -> str:
+        return " ".join(claim.lower().split())
+
+    def _touch(self, key: str, claim: str, now: float) -> dict:
+        entry = self.entries.get(key)
+        if entry is None:
+            if len(self.entries) >= self.max_tracked:
+                self._prune(now)
+            entry = {"claim": claim, "result": None, "fetched_at": 0.0, "score": 0.0, "seen_at": now}
+            self.entries[key] = entry
+        # exponentially decayed request count
+        entry["score"] = self._score(entry, now) + 1.0
+        entry["seen_at"] = now
+        return entry
+
+    def _score(self, entry: dict, now: float) -> float:
+        return entry["score"] * 0.5 ** ((now - entry["seen_at"]) / self.half_life)
+
+    def _prune(self, now: float):
+        keep = sorted(self.entries.items(), key=lambda kv: self._score(kv[1], now), reverse=True)
+        self.entries = dict(keep[: int(self.max_tracked * 0.9)])
+
+    def get(self, claim: str):
+        """Return a stored verdict (scheduling revalidation if stale), or None on miss."""
+        now = time.time()
+        key = self.key(claim)
+        entry = self._touch(key, claim, now)
+        if entry["result"] is None:
+            self.stats_counts["miss"] += 1
+            return None
+
+        age = now - entry["fetched_at"]
+        if age < self.soft_ttl:
+            self.stats_counts["fresh"] += 1
+            return entry["result"]
+        if age < self.hard_ttl:
+            self.stats_counts["stale"] += 1
+            self._revalidate(key)
+            return entry["result"]
+
+        self.stats_counts["miss"] += 1
+        return None
+
+    def tracks(self, claim: str) -> bool:
+        """True if a verdict for this exact claim was stored (even if now hard-expired)."""
+        entry = self.entries.get(self.key(claim))
+        return entry is not None and entry["result"] is not None
+
+    async def fetch(self, claim: str) -> dict:
+        """Compute a verdict for a miss; concurrent callers for the same claim share one run."""
+        key = self.key(claim)
+        task = self.inflight.get(key)
+        if task is None:
+            task = self._start(key, claim)
+        return await asyncio.shield(task)
+
+    def _start(self, key: str, claim: str) -> asyncio.Task:
+        task = asyncio.ensure_future(self._run(key, claim))
+        self.inflight[key] = task
+        task.add_done_callback(lambda t: self.inflight.pop(key, None))
+        return task
+
+    async def _run(self, key: str, claim: str) -> dict:
+        result = await self.compute(claim)
+        if not self.should_store(result):
+            return result
+        entry = self.entries.get(key)
+        if entry is None:
+            entry = self._touch(key, claim, time.time())
+        entry["result"] = result
+        entry["fetched_at"] = time.time()
+        stance_calls = float(result.get("stance_calls", self.groq_per_run) or 0)
+        self.groq_per_run = 0.8 * self.groq_per_run + 0.2 * stance_calls
+        return result
+
+    def _revalidate(self, key: str) -> bool:
+        if key in self.inflight:
+            return True
+        if not (self.serp_budget.available(1) and self.groq_budget.available(self.groq_per_run)):
+            self.stats_counts["budget_skips"] += 1
+            return False
+        self.serp_budget.spend(1)
+        self.groq_budget.spend(self.groq_per_run)
+        self.stats_counts["refreshes"] += 1
+        task = self._start(key, self.entries[key]["claim"])
+        task.add_done_callback(self._log_failure)
+        return True
+
+    @staticmethod
+    def _log_failure(task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Background claim refresh failed: %r", task.exception())
+
+    def refresh_hot(self):
+        now = time.time()
+        known = [(k, e) for k, e in self.entries.items() if e["result"] is not None]
+        hot = sorted(known, key=lambda kv: self._score(kv[1], now), reverse=True)[: self.top_n]
+        for key, entry in hot:
+            if now - entry["fetched_at"] >= self.soft_ttl * REFRESH_AHEAD:
+                if not self._revalidate(key):
+                    break
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self.refresh_hot()
+            except Exception:
+                logger.exception("Hot claim refresh tick failed")
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._loop())
+
+    async def stop(self):
+        tasks = [t for t in [self._task, *self.inflight.values()] if t is not None]
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+
+    def stats(self) -> dict:
+        return {
+            **self.stats_counts,
+            "tracked": len(self.entries),
+            "inflight": len(self.inflight),
+            "serp_budget_left": round(self.serp_budget.tokens, 1),
+            "groq_budget_left": round(self.groq_budget.tokens, 1),
+        }
@@ -0,0 +1,130 @@
+# app/utils/replay.py
+"""
+Capture and deterministic replay of external calls (SerpAPI, Groq).
+
+REPLAY_MODE=record  stores every wrapped call's request/response plus its
+                    observed latency, and appends incoming claims to
+                    <REPLAY_DIR>/claims.jsonl.
+REPLAY_MODE=replay  serves the stored responses back without touching the
+                    network, sleeping latency * REPLAY_TIME_SCALE.
+
+Records are gzipped JSON, content-addressed by a hash of the request:
+<REPLAY_DIR>/<kind>/<hh>/<sha256>.json.gz
+
+Use app/utils/replay_driver.py to re-issue a captured claim log.
+"""
+
+import gzip
+import json
+import time
+import hashlib
+import functools
+import logging
+import threading
+from collections import Counter
+from pathlib import Path
+
+from app.config import REPLAY_MODE, REPLAY_DIR, REPLAY_TIME_SCALE
+
+CLAIM_LOG = "claims.jsonl"
+
+logger = logging.getLogger("uvicorn.error")
+
+_log_lock = threading.Lock()
+_counts = Counter()  # "<kind>_hits" / "<kind>_misses" in replay mode
+
+
+class ReplayMiss(LookupError):
+    pass
+
+
+def request_key(kind: str, payload: dict) -> str:
+    blob = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(f"{kind}\n{blob}".encode("utf-8")).hexdigest()
+
+
+def _path(kind: str, key: str) -> Path:
+    return Path(REPLAY_DIR) / kind / key[:2] / f"{key}.json.gz"
+
+
+def load(kind: str, key: str):
+    p = _path(kind, key)
+    if not p.exists():
+        return None
+    with gzip.open(p, "rt", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def store(kind: str, key: str, payload: dict, response, latency: float):
+    p = _path(kind, key)
+    if p.exists():
+        # content-addressed: keep the first observation
+        return
+    p.parent.mkdir(parents=True, exist_ok=True)
+    tmp = p.with_suffix(f".tmp{threading.get_ident()}")
+    with gzip.open(tmp, "wt", encoding="utf-8") as f:
+        json.dump({"request": payload, "response": response, "latency": latency, "recorded_at": time.time()},
+                  f, ensure_ascii=False, separators=(",", ":"))
+    tmp.replace(p)
+
+
+def log_claim(claim: str):
+    if REPLAY_MODE != "record":
+        return
+    p = Path(REPLAY_DIR) / CLAIM_LOG
+    p.parent.mkdir(parents=True, exist_ok=True)
+    line = json.dumps({"t": time.time(), "text": claim}, ensure_ascii=False)
+    with _log_lock, open(p, "a", encoding="utf-8") as f:
+        f.write(line + "\n")
+
+
+def stats() -> dict:
+    out = {"mode": REPLAY_MODE, **_counts}
+    for kind in {k.rsplit("_", 1)[0] for k in _counts}:
+        total = _counts[f"{kind}_hits"] + _counts[f"{kind}_misses"]
+        out[f"{kind}_miss_rate"] = round(_counts[f"{kind}_misses"] / total, 4) if total else 0.0
+    return out
+
+
+def replayable(kind: str, key_fn, encode=lambda r: r, decode=lambda d: d,
+               should_store=lambda r: True, on_miss=None):
+    """
+    Wrap a blocking external call. key_fn takes the call's arguments and
+    returns the JSON payload that identifies the request (leave secrets out).
+    encode/decode convert the response to and from JSON-friendly data.
+    should_store filters out responses not worth keeping (e.g. error fallbacks).
+    on_miss(*args, **kwargs) supplies the replay answer for unrecorded
+    requests; without it a miss raises ReplayMiss.
+    """
+    def deco(fn):
+        if REPLAY_MODE not in ("record", "replay"):
+            return fn
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            payload = key_fn(*args, **kwargs)
+            key = request_key(kind, payload)
+
+            if REPLAY_MODE == "replay":
+                rec = load(kind, key)
+                if rec is None:
+                    _counts[f"{kind}_misses"] += 1
+                    logger.warning("Replay miss for %s %s (miss rate %.1f%%)",
+                                   kind, key[:12], 100 * stats()[f"{kind}_miss_rate"])
+                    if on_miss is None:
+                        raise ReplayMiss(f"no recorded {kind} response for {key}")
+                    return on_miss(*args, **kwargs)
+                _counts[f"{kind}_hits"] += 1
+                if REPLAY_TIME_SCALE > 0:
+                    time.sleep(rec["latency"] * REPLAY_TIME_SCALE)
+                return decode(rec["response"])
+
+            t0 = time.perf_counter()
+            resp = fn(*args, **kwargs)
+            # content-addressed and first-write-wins, so a transient failure must not be stored
+            if should_store(resp):
+                store(kind, key, payload, encode(resp), time.perf_counter() - t0)
+            return resp
+
+        return wrapper
+    return deco
@@ -0,0 +1,93 @@
+# app/utils/replay_driver.py
+"""
+Re-issues a captured claim log (see app/utils/replay.py) against /predict,
+preserving the original inter-arrival times, optionally sped up.
+
+    python -m app.utils.replay_driver data/replay/claims.jsonl --speed 4
+    python -m app.utils.replay_driver claims.jsonl --speed 0   # as fast as allowed
+"""
+
+import sys
+import json
+import time
+import asyncio
+import argparse
+from collections import Counter
+
+import httpx
+
+
+def load_claims(path: str):
+    claims = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            rec = json.loads(line)
+            if rec.get("text"):
+                claims.append((float(rec.get("t", 0.0)), rec["text"]))
+    claims.sort(key=lambda c: c[0])
+    return claims
+
+
+def _pct(sorted_vals, q: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    i = min(len(sorted_vals) - 1, int(round(q * (len(sorted_vals) - 1))))
+    return sorted_vals[i]
+
+
+async def run(claims, url: str, speed: float, max_inflight: int, timeout: float):
+    sem = asyncio.Semaphore(max_inflight)
+    results = []  # (status, latency)
+    t0_log = claims[0][0] if claims else 0.0
+    t0 = time.perf_counter()
+
+    async with httpx.AsyncClient(timeout=timeout) as client:
+        async def fire(offset: float, text: str):
+            if speed > 0:
+                delay = offset / speed - (time.perf_counter() - t0)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            async with sem:
+                start = time.perf_counter()
+                try:
+                    r = await client.post(url, json={"text": text})
+                    status = r.status_code
+                except httpx.HTTPError as e:
+                    status = type(e).__name__
+                results.append((status, time.perf_counter() - start))
+
+        await asyncio.gather(*(fire(t - t0_log, text) for t, text in claims))
+
+    return results, time.perf_counter() - t0
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Replay a captured claim log against /predict")
+    ap.add_argument("claim_log")
+    ap.add_argument("--url", default="http://localhost:8000/predict")
+    ap.add_argument("--speed", type=float, default=1.0, help="time acceleration; 0 = no pacing")
+    ap.add_argument("--max-inflight", type=int, default=64)
+    ap.add_argument("--timeout", type=float, default=120.0)
+    args = ap.parse_args(argv)
+
+    claims = load_claims(args.claim_log)
+    if not claims:
+        print("No claims in log.")
+        return 1
+
+    results, wall = asyncio.run(run(claims, args.url, args.speed, args.max_inflight, args.timeout))
+    lat = sorted(l for _, l in results)
+    statuses = Counter(str(s) for s, _ in results)
+
+    print(f"requests: {len(results)} in {wall:.2f}s ({len(results) / max(wall, 1e-9):.2f} req/s)")
+    print("status:   " + ", ".join(f"{k}={v}" for k, v in sorted(statuses.items())))
+    print(f"latency:  p50={_pct(lat, 0.50):.3f}s p95={_pct(lat, 0.95):.3f}s "
+          f"p99={_pct(lat, 0.99):.3f}s max={lat[-1]:.3f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,197 @@
+# app/utils/semantic_cache.py
+"""
+Semantic verdict cache. Claims are embedded with the shared Embedder and
+looked up in a dedicated FaissIndex, so paraphrases such as
+"Is Florida in India?" / "Florida is located in India" reuse one verdict.
+
+A hit needs cosine similarity >= threshold AND matching negation / numbers,
+because "X is dead" vs "X is not dead" or "12 months" vs "15 months" embed
+almost identically but flip the verdict.
+
+Each uvicorn worker keeps its own in-memory copy; periodic saves merge it
+with the shared copy on disk, so workers pick up each other's entries.
+"""
+
+import re
+import json
+import time
+import fcntl
+import threading
+
+import faiss
+import numpy as np
+
+from app.config import (
+    SEMANTIC_CACHE_DIR,
+    SEMANTIC_CACHE_THRESHOLD,
+    SEMANTIC_CACHE_TTL,
+    SEMANTIC_CACHE_MAX_ENTRIES,
+)
+from app.utils.faiss_index import FaissIndex
+
+NEGATIONS = {
+    "not", "no", "never", "none", "nobody", "nothing", "neither", "nor", "cannot", "without",
+}
+NUMBER_WORDS = {
+    "zero", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine", "ten",
+    "eleven", "twelve", "thirteen", "fourteen", "fifteen", "sixteen", "seventeen", "eighteen",
+    "nineteen", "twenty", "thirty", "forty", "fifty", "sixty", "seventy", "eighty", "ninety",
+    "hundred", "thousand", "million", "billion", "trillion",
+}
+_NUM_RE = re.compile(r"\d+(?:[.,]\d+)*")
+_WORD_RE = re.compile(r"[a-z']+")
+
+
+def _numbers(text: str) -> set:
+    nums = {n.replace(",", "") for n in _NUM_RE.findall(text)}
+    nums.update(w for w in _WORD_RE.findall(text.lower()) if w in NUMBER_WORDS)
+    return nums
+
+
+def _is_negated(text: str) -> bool:
+    words = _WORD_RE.findall(text.lower())
+    count = sum(1 for w in words if w in NEGATIONS or w.endswith("n't"))
+    return count % 2 == 1
+
+
+def guard_passes(claim: str, cached_claim: str) -> bool:
+    return _numbers(claim) == _numbers(cached_claim) and _is_negated(claim) == _is_negated(cached_claim)
+
+
+class SemanticCache:
+    def __init__(self, embedder, index_dir=SEMANTIC_CACHE_DIR, threshold: float = SEMANTIC_CACHE_THRESHOLD,
+                 ttl: int = SEMANTIC_CACHE_TTL, max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES):
+        self.store = FaissIndex(index_dir=index_dir, embedder=embedder)
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.guard_rejects = 0
+        self.dirty = False
+        self._lock = threading.Lock()
+
+    def _expired(self, entry: dict, now: float) -> bool:
+        return now - entry.get("created", 0) > self.ttl
+
+    def get(self, claim: str):
+        """Return a cached verdict dict for a paraphrase of `claim`, or None."""
+        now = time.time()
+        with self._lock:
+            if not self.store.meta:
+                self.misses += 1
+                return None
+
+            hits = self.store.search(claim, top_k=min(5, len(self.store.meta)))
+            stale = [h["pos"] for h in hits if self._expired(h, now)]
+            if stale:
+                self.store.remove(stale, save=False)
+                self.dirty = True
+
+            for h in hits:
+                if h["score"] < self.threshold or self._expired(h, now):
+                    continue
+                if not guard_passes(claim, h["claim"]):
+                    self.guard_rejects += 1
+                    continue
+                self.hits += 1
+                result = dict(h["result"])
+                result["input"] = claim
+                result["cached"] = "semantic"
+                result["cache_similarity"] = round(h["score"], 4)
+                return result
+
+            self.misses += 1
+            return None
+
+    def put(self, claim: str, result: dict):
+        now = time.time()
+        with self._lock:
+            # a refreshed verdict replaces the previous one for the same claim
+            drop = [i for i, m in enumerate(self.store.meta) if self._expired(m, now) or m.get("claim") == claim]
+            overflow = len(self.store.meta) - len(drop) + 1 - self.max_entries
+            if overflow > 0:
+                # meta is in insertion order, so the oldest live entries come first
+                dropped = set(drop)
+                live = [i for i in range(len(self.store.meta)) if i not in dropped]
+                drop.extend(live[:overflow])
+            if drop:
+                self.store.remove(drop, save=False)
+            self.store.add_docs([{"text": claim, "claim": claim, "created": now, "result": result}], save=False)
+            self.dirty = True
+
+    def save(self):
+        """
+        Persist to disk. Called off the request path (periodic task / shutdown),
+        never from get() or put(); only the in-memory snapshot is taken under the lock.
+
+        uvicorn workers share SEMANTIC_CACHE_DIR, so the write merges with what
+        is on disk (under a file lock) instead of overwriting other workers'
+        entries: per claim the newest entry wins, expired ones are dropped and
+        the newest max_entries are kept. Entries merged in from disk are then
+        added to this worker's in-memory cache as well.
+        """
+        with self._lock:
+            if not self.dirty:
+                return
+            meta = list(self.store.meta)
+            dim = self.store.index.d
+            vecs = self.store.index.reconstruct_n(0, self.store.index.ntotal).reshape(-1, dim)
+            self.dirty = False
+        try:
+            with open(self.store.index_dir / ".lock", "a") as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                meta, vecs, from_disk = self._merge_disk(meta, vecs)
+                index = faiss.IndexFlatIP(dim)
+                index.add(vecs)
+                self.store.write_files(index, meta)
+        except Exception:
+            self.dirty = True
+            raise
+        if from_disk:
+            self._adopt(meta, vecs, from_disk)
+
+    def _merge_disk(self, meta: list, vecs):
+        now = time.time()
+        newest = {m.get("claim"): (m, vecs[i], False) for i, m in enumerate(meta) if not self._expired(m, now)}
+        try:
+            disk_index = faiss.read_index(str(self.store.index_file))
+            with open(self.store.meta_file, "r", encoding="utf-8") as f:
+                disk_meta = json.load(f)
+        except Exception:
+            disk_index, disk_meta = None, []
+        if disk_index is not None and disk_index.ntotal == len(disk_meta):
+            for i, m in enumerate(disk_meta):
+                cur = newest.get(m.get("claim"))
+                if self._expired(m, now) or (cur and cur[0].get("created", 0) >= m.get("created", 0)):
+                    continue
+                newest[m.get("claim")] = (m, disk_index.reconstruct(i), True)
+
+        keep = sorted(newest.values(), key=lambda e: e[0].get("created", 0))[-self.max_entries:]
+        merged_vecs = np.asarray([e[1] for e in keep], dtype="float32").reshape(-1, vecs.shape[1])
+        from_disk = [i for i, e in enumerate(keep) if e[2]]
+        return [e[0] for e in keep], merged_vecs, from_disk
+
+    def _adopt(self, meta: list, vecs, positions: list):
+        with self._lock:
+            known = {m.get("claim"): m.get("created", 0) for m in self.store.meta}
+            add = [i for i in positions if known.get(meta[i].get("claim"), -1) < meta[i].get("created", 0)]
+            room = self.max_entries - len(self.store.meta)
+            if not add or room <= 0:
+                return
+            add = add[-room:]  # positions are oldest first
+            replaced = {meta[i].get("claim") for i in add}
+            stale = [i for i, m in enumerate(self.store.meta) if m.get("claim") in replaced]
+            if stale:
+                self.store.remove(stale, save=False)
+            self.store.add_embeddings([meta[i] for i in add], vecs[add], save=False)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self.store.meta),
+            "hits": self.hits,
+            "misses": self.misses,
+            "guard_rejects": self.guard_rejects,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }